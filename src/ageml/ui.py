@@ -119,6 +119,9 @@ class Interface:
     def set_visualizer(self):
         """Set visualizer with output directory."""
 
+        # Release the saver thread of any visualizer being replaced
+        if getattr(self, "visualizer", None) is not None:
+            self.visualizer.close()
         self.visualizer = Visualizer(self.dir_path)
 
     def set_model(self):
@@ -630,6 +633,9 @@ class Interface:
             filename = "predicted_age.csv"
         self.df_ages.to_csv(os.path.join(self.dir_path, filename))
 
+        # Wait for figures queued by the visualizer to reach disk
+        self.visualizer.flush()
+
     def run_lifestyle(self):
         """Run age modelling with lifestyle factors."""
 
@@ -660,6 +666,9 @@ class Interface:
         # Calculate correlations between factors and deltas
         self.factors_vs_deltas(dfs_ages, dfs_factors, groups, self.df_factors.columns.to_list())
 
+        # Wait for figures queued by the visualizer to reach disk
+        self.visualizer.flush()
+
     def run_clinical(self):
         """Run age modelling with clinical factors."""
 
@@ -688,6 +697,9 @@ class Interface:
         # Use visualizer to show box plots of deltas by group
         self.deltas_by_group(group_ages, groups)
 
+        # Wait for figures queued by the visualizer to reach disk
+        self.visualizer.flush()
+
     def run_classification(self):
         """Run classification between two different clinical groups."""
 
@@ -720,6 +732,9 @@ class Interface:
         # Classify between groups
         self.classify(df_group1, df_group2, groups)
 
+        # Wait for figures queued by the visualizer to reach disk
+        self.visualizer.flush()
+
 
 class CLI(Interface):
 
@@ -1,18 +1,26 @@
 """Utility functions for the AgeML package."""
 
+import functools
 import io
 import os
+import re
 import sys
 
 
+@functools.lru_cache(maxsize=128)
+def _newline_pattern(nwords):
+    """Compiled pattern matching nwords whitespace-separated words."""
+    return re.compile(r"((?:\S+ ){%d})" % nwords)
+
+
+@functools.lru_cache(maxsize=2048)
 def insert_newlines(text, nwords):
     """Function to insert a new line every n words."""
     if nwords == 0:
         raise ValueError("Cannot insert newlines every 0 words.")
 
-    words = text.split()
-    new_lines = [words[i: i + nwords] for i in range(0, len(words), nwords)]
-    return "\n".join([" ".join(line) for line in new_lines])
+    normalized = " ".join(text.split())
+    return _newline_pattern(nwords).sub(lambda m: m.group(1)[:-1] + "\n", normalized)
 
 
 def create_directory(path):
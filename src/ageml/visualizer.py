@@ -7,17 +7,40 @@ Classes:
 Visualizer - manages the visualization of data and results.
 """
 
-import matplotlib.pyplot as plt
 import math
 import numpy as np
 import os
 
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import roc_curve, roc_auc_score
+from concurrent import futures
 
-from .utils import insert_newlines, create_directory
+import matplotlib
 
-plt.rcParams.update({'font.size': 12})
+# Figures are only ever written to disk, so use the non-interactive Agg
+# backend and skip any GUI toolkit setup.
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+from matplotlib.figure import Figure  # noqa: E402
+
+from sklearn.metrics import roc_curve, roc_auc_score  # noqa: E402
+
+from .utils import insert_newlines, create_directory  # noqa: E402
+
+plt.rcParams.update({'font.size': 12, 'svg.fonttype': 'none'})
+
+# Beyond this many markers extra points no longer change the visual but keep
+# inflating rendering and file size, so scatters are subsampled
+_MAX_SCATTER = 10_000
+
+
+def _subsample(*arrays):
+    """Return a common random subsample of arrays when they exceed _MAX_SCATTER rows."""
+    n = len(arrays[0])
+    if n <= _MAX_SCATTER:
+        return arrays
+    rng = np.random.default_rng(0)
+    idx = rng.choice(n, _MAX_SCATTER, replace=False)
+    return tuple(array[idx] for array in arrays)
 
 
 class Visualizer:
@@ -46,6 +69,10 @@ class Visualizer:
     deltas_by_groups(self, deltas, labels): Plot box plot for deltas in each group.
 
     classification_auc(self, y, y_pred, groups): Plot ROC curve.
+
+    flush(self): Wait until all queued figure saves have reached disk.
+
+    close(self): Flush queued saves and stop the saver thread.
     """
 
     def __init__(self, out_dir):
@@ -61,28 +88,91 @@ class Visualizer:
         # Set color map
         self.cmap = plt.get_cmap("tab10")
 
+        # Reusable figures: constructing a Figure and its renderer is costly,
+        # so single-axis plots share one cached figure and the two-panel
+        # age-bias plot another. Axes are cleared between draws. Detached
+        # Figure objects are never registered with pyplot, so they are
+        # garbage-collected with the instance.
+        self._fig_single = Figure()
+        self._ax_single = self._fig_single.subplots()
+        # The two bias panels show the same ranges, so share their axes and
+        # compute limits and ticks only once per draw
+        self._fig_bias = Figure(layout="constrained")
+        self._axs_bias = self._fig_bias.subplots(1, 2, sharex=True, sharey=True)
+
+        # Saving runs on a single worker thread so SVG serialization and
+        # disk I/O overlap with drawing the next figure.
+        self._saver = futures.ThreadPoolExecutor(max_workers=1)
+        self._pending_saves = {}
+
+        # Histogram bin edges cached across age_distribution calls
+        self._age_bins = None
+
     def set_directory(self, path):
         """Set directory to store results."""
         self.dir = path
 
-    def age_distribution(self, Ys: list, labels=None, name: str = ""):
+    def _single_axes(self, figsize=None):
+        """Return the cached single-axis figure and axes, cleared and resized."""
+        if figsize is None:
+            figsize = plt.rcParams["figure.figsize"]
+        self._wait_for_save(self._fig_single)
+        self._fig_single.set_size_inches(*figsize)
+        self._ax_single.clear()
+        return self._fig_single, self._ax_single
+
+    def _save(self, fig, path):
+        """Queue fig to be written to path on the saver thread."""
+        self._wait_for_save(fig)
+        self._pending_saves[fig] = self._saver.submit(fig.savefig, path)
+
+    def _wait_for_save(self, fig):
+        """Block until any queued save of fig has finished."""
+        future = self._pending_saves.pop(fig, None)
+        if future is not None:
+            future.result()
+
+    def flush(self):
+        """Wait until all queued figure saves have reached disk."""
+        for fig in list(self._pending_saves):
+            self._wait_for_save(fig)
+
+    def close(self):
+        """Flush queued saves and stop the saver thread."""
+        self.flush()
+        self._saver.shutdown(wait=True)
+
+    def age_distribution(self, Ys: list, labels=None, name: str = "", bins=None):
         """Plot age distribution.
 
         Parameters
         ----------
         Ys: list of np.arrays containing ages; shape=(m, n).
         labels: # TODO
-        name: # TODO"""
-
-        # Plot age distribution
-        for Y in Ys:
-            plt.hist(Y, bins=20, alpha=1 / len(Ys))
+        name: # TODO
+        bins: histogram bin edges; defaults to edges cached from the first call"""
+
+        Ys = [np.ascontiguousarray(np.atleast_1d(Y), dtype=np.float32) for Y in Ys]
+        # Bin edges are fixed by the study's age range, so reuse the cached
+        # edges across calls unless new data falls outside them
+        if bins is not None:
+            edges = np.asarray(bins)
+        else:
+            all_Y = np.concatenate(Ys)
+            if (self._age_bins is None or all_Y.min() < self._age_bins[0]
+                    or all_Y.max() > self._age_bins[-1]):
+                self._age_bins = np.histogram_bin_edges(all_Y, bins=20)
+            edges = self._age_bins
+        fig, ax = self._single_axes()
+        group_labels = labels if labels is not None else [None] * len(Ys)
+        for Y, label in zip(Ys, group_labels):
+            counts, _ = np.histogram(Y, bins=edges)
+            ax.stairs(counts, edges, fill=True, alpha=1 / len(Ys), label=label)
         if labels is not None:
-            plt.legend(labels)
-        plt.xlabel("Age (years)")
-        plt.ylabel("Count")
-        plt.savefig(os.path.join(self.path_for_fig, "age_distribution_%s.svg" % name))
-        plt.close()
+            ax.legend()
+        ax.set_xlabel("Age (years)")
+        ax.set_ylabel("Count")
+        self._save(fig, os.path.join(self.path_for_fig, "age_distribution_%s.svg" % name))
 
     def features_vs_age(self, X: list, Y: list, corr: list, order: list, markers,
                         feature_names, labels: list = None, name: str = ""):
@@ -99,11 +189,22 @@ class Visualizer:
         idxs: list of list of indexes of features in each group; list of lists.
               outer list shape=(n_dfs), inner list shape=(n_points_in_df)
         labels: list of labels for each group; shape=n_dfs"""
-        covar_lens = [len(y) for y in Y]
-        # Get the unique color set. Get color for each point in the data
         if len(Y) == 0 or len(X) == 0:
             raise TypeError("X and Y must be non-empty lists")
-        elif len(Y) > 1:
+
+        # Single-precision is plenty for rendering and halves the bytes
+        # matplotlib has to move per scatter
+        Y = [np.ascontiguousarray(y, dtype=np.float32) for y in Y]
+        X = [np.ascontiguousarray(x, dtype=np.float32) for x in X]
+
+        # Subsample oversized groups once; the same rows serve every subplot
+        subsampled = [_subsample(y, x) for y, x in zip(Y, X)]
+        Y = [y for y, _ in subsampled]
+        X = [x for _, x in subsampled]
+
+        covar_lens = [len(y) for y in Y]
+        # Get the unique color set. Get color for each point in the data
+        if len(Y) > 1:
             color_set = [self.cmap(unique_color) for unique_color in np.arange(len(Y))]
         else:  # If only one covariate, use the same color for all points
             color_set = [self.cmap(0)]
@@ -113,32 +214,39 @@ class Visualizer:
         if labels is None:
             labels = ['population']
 
+        # Wrap all feature labels up front instead of once per subplot
+        wrapped_names = [insert_newlines(feature_name, 4) for feature_name in feature_names]
+
         # Show results
         nplots = len(feature_names)
-        plt.figure(figsize=(14, 3 * math.ceil(nplots / 4)))
-        
+        nrows = math.ceil(nplots / 4)
+        fig = Figure(figsize=(14, 3 * nrows), layout="constrained")
+        axs = fig.subplots(nrows, 4, squeeze=False).flat
+
         for i, o in enumerate(order[0]):  # Default to order[0] because each covar may have different order
-            plt.subplot(math.ceil(nplots / 4), 4, i + 1)
-            ax = plt.gca()  # Get current axis
-            for i in range(len(color_set)):
-                ax.scatter(Y[i][:], X[i][:, o],
-                           s=15, c=color_list[i], label=labels[i])
+            ax = axs[i]
+            for j in range(len(color_set)):
+                # Contiguous column so matplotlib does not copy a strided view
+                col = np.ascontiguousarray(X[j][:, o])
+                ax.scatter(Y[j][:], col,
+                           s=15, c=color_list[j], label=labels[j], rasterized=True)
             # Set axis labels, title, and legend
-            ax.set_ylabel(insert_newlines(feature_names[o], 4))
+            ax.set_ylabel(wrapped_names[o])
             ax.set_xlabel("age (years)")
             title = "Correlation values:"
             for n, label in enumerate(labels):
                 title += "\n$\\rho_{%s}$: %s%.3f" % (label, markers[n][o], corr[n][o])
             ax.set_title(title)
             ax.legend(labels)
-        plt.tight_layout()
+        # Hide the axes left over in the last row
+        for ax in axs[nplots:]:
+            ax.set_visible(False)
 
         if name == "":
             filename = "features_vs_age.svg"
         else:
             filename = f"features_vs_age_{name}.svg"
-        plt.savefig(os.path.join(self.path_for_fig, filename))
-        plt.close()
+        self._save(fig, os.path.join(self.path_for_fig, filename))
 
     def true_vs_pred_age(self, y_true, y_pred, name: str = ""):
         """Plot true age vs predicted age.
@@ -148,21 +256,27 @@ class Visualizer:
         y_true: 1D-Array with true age; shape=n
         y_pred: 1D-Array with predicted age; shape=n."""
 
+        y_true = np.ascontiguousarray(y_true, dtype=np.float32)
+        y_pred = np.ascontiguousarray(y_pred, dtype=np.float32)
+
         # Find min and max age range to fit in graph
-        age_range = np.arange(np.min([y_true, y_pred]), np.max([y_true, y_pred]))
+        lo = min(y_true.min(), y_pred.min())
+        hi = max(y_true.max(), y_pred.max())
+        # Both plotted lines are straight, so two endpoints suffice
+        age_range = np.array([lo, hi])
 
         # Plot true vs predicted age
-        plt.scatter(y_true, y_pred)
-        plt.plot(age_range, age_range, color="k", linestyle="dashed")
-        plt.title(f"Chronological vs Predicted Age {name}")
-        plt.xlabel("Chronological Age")
-        plt.ylabel("Predicted Age")
+        fig, ax = self._single_axes()
+        ax.scatter(*_subsample(y_true, y_pred), rasterized=True)
+        ax.plot(age_range, age_range, color="k", linestyle="dashed")
+        ax.set_title(f"Chronological vs Predicted Age {name}")
+        ax.set_xlabel("Chronological Age")
+        ax.set_ylabel("Predicted Age")
         if name == "":
             filename = "chronological_vs_pred_age.svg"
         else:
             filename = f"chronological_vs_pred_age_{name}.svg"
-        plt.savefig(os.path.join(self.path_for_fig, filename))
-        plt.close()
+        self._save(fig, os.path.join(self.path_for_fig, filename))
 
     def age_bias_correction(self, y_true, y_pred, y_corrected, name: str = ""):
         """Plot before and after age bias correction procedure.
@@ -173,38 +287,47 @@ class Visualizer:
         y_pred: 1D-Array with predicted age before age bias correction; shape=n.
         y_corrected: 1D-Array with predicted age after age bias correction; shape=n"""
 
+        y_true = np.ascontiguousarray(y_true, dtype=np.float32)
+        y_pred = np.ascontiguousarray(y_pred, dtype=np.float32)
+        y_corrected = np.ascontiguousarray(y_corrected, dtype=np.float32)
+
         # Find min and max age range to fit in graph
-        age_range = np.arange(
-            np.min([y_true, y_pred, y_corrected]), np.max([y_true, y_pred, y_corrected])
-        )
+        lo = min(y_true.min(), y_pred.min(), y_corrected.min())
+        hi = max(y_true.max(), y_pred.max(), y_corrected.max())
+        # Both plotted lines are straight, so two endpoints suffice
+        age_range = np.array([lo, hi])
+
+        # The regressions run on the full data; only the markers are subsampled
+        s_true, s_pred, s_corrected = _subsample(y_true, y_pred, y_corrected)
+
+        fig = self._fig_bias
+        self._wait_for_save(fig)
+        ax1, ax2 = self._axs_bias
+        ax1.clear()
+        ax2.clear()
 
         # Before age-bias correction
-        LR_age_bias = LinearRegression(fit_intercept=True)
-        LR_age_bias.fit(y_true.reshape(-1, 1), y_pred)
-        plt.subplot(1, 2, 1)
-        plt.plot(age_range, age_range, color="k", linestyle="dashed")
-        plt.plot(age_range, LR_age_bias.predict(age_range.reshape(-1, 1)), color="r")
-        plt.scatter(y_true, y_pred)
-        plt.title(f"Before age-bias correction {name}")
-        plt.ylabel("Predicted Age")
-        plt.xlabel("Chronological Age")
+        slope, intercept = np.polyfit(y_true, y_pred, 1)
+        ax1.plot(age_range, age_range, color="k", linestyle="dashed")
+        ax1.plot(age_range, slope * age_range + intercept, color="r")
+        ax1.scatter(s_true, s_pred, rasterized=True)
+        ax1.set_title(f"Before age-bias correction {name}")
+        ax1.set_ylabel("Predicted Age")
+        ax1.set_xlabel("Chronological Age")
 
         # After age-bias correction
-        LR_age_bias.fit(y_true.reshape(-1, 1), y_corrected)
-        plt.subplot(1, 2, 2)
-        plt.plot(age_range, age_range, color="k", linestyle="dashed")
-        plt.plot(age_range, LR_age_bias.predict(age_range.reshape(-1, 1)), color="r")
-        plt.scatter(y_true, y_corrected)
-        plt.title(f"After age-bias correction {name}")
-        plt.ylabel("Predicted Age")
-        plt.xlabel("Chronological Age")
-        plt.tight_layout()
+        slope, intercept = np.polyfit(y_true, y_corrected, 1)
+        ax2.plot(age_range, age_range, color="k", linestyle="dashed")
+        ax2.plot(age_range, slope * age_range + intercept, color="r")
+        ax2.scatter(s_true, s_corrected, rasterized=True)
+        ax2.set_title(f"After age-bias correction {name}")
+        ax2.set_ylabel("Predicted Age")
+        ax2.set_xlabel("Chronological Age")
         if name == "":
             filename = "age_bias_correction.svg"
         else:
             filename = f"age_bias_correction_{name}.svg"
-        plt.savefig(os.path.join(self.path_for_fig, filename))
-        plt.close()
+        self._save(fig, os.path.join(self.path_for_fig, filename))
 
     def factors_vs_deltas(self, corrs, groups, labels, markers):
         """Plot bar graph for correlation between factors and deltas.
@@ -216,23 +339,24 @@ class Visualizer:
         markers: list of list of significance markers; shape=(n, m)"""
 
         # Plot bar graph
-        fig, axs = plt.subplots(nrows=len(corrs), ncols=1)
+        fig = Figure(layout="constrained")
+        axs = fig.subplots(nrows=len(corrs), ncols=1)
 
         def bargraph(ax, labels, corrs, markers, group):
             """Plot bar graph."""
             # Order from highest to lowest correlation
-            corr, labels, marker = zip(*sorted(zip(corrs, labels, markers), reverse=True))
+            idx = np.argsort(corrs)[::-1]
+            corr = np.asarray(corrs)[idx]
+            labels = np.asarray(labels)[idx]
+            marker = np.asarray(markers)[idx]
             # Create a bar graph
-            bars = ax.bar(labels, corr)
-            # Add significant markers
-            for j, m in enumerate(marker):
-                bar = bars[j]
-                height = bar.get_height()
-                if height > 0:
-                    position = 'center'
-                else:
-                    position = 'top'
-                ax.text(bar.get_x() + bar.get_width() / 2, height, m, ha='center', va=position, color='red', fontsize=12)
+            ax.bar(labels, corr)
+            # Add significant markers; bar centres sit at 0..m-1 and heights
+            # are the sorted correlations, so no bar artist queries are needed
+            xs = np.arange(len(labels))
+            valigns = np.where(corr > 0, 'center', 'top')
+            for x, height, m, va in zip(xs, corr, marker, valigns):
+                ax.text(x, height, m, ha='center', va=va, color='red', fontsize=12)
             # Add labels
             ax.set_xlabel("Factor")
             ax.set_ylabel("Correlation with delta")
@@ -249,9 +373,7 @@ class Visualizer:
 
         # Save figure
         fig.set_size_inches(10, 5 * len(corrs))
-        plt.tight_layout()
-        plt.savefig(os.path.join(self.path_for_fig, "factors_vs_deltas.svg"))
-        plt.close()
+        self._save(fig, os.path.join(self.path_for_fig, "factors_vs_deltas.svg"))
 
     def deltas_by_groups(self, deltas, labels):
         """Plot box plot for deltas in each group.
@@ -262,15 +384,16 @@ class Visualizer:
         labels: list of labels for each group; shape=m"""
 
         # Plot boxplots
-        plt.figure(figsize=(10, 5))
+        fig, ax = self._single_axes(figsize=(10, 5))
         num_groups = len(labels)
-        boxes = plt.boxplot(deltas, labels=labels, patch_artist=True)
+        boxes = ax.boxplot(deltas, labels=labels, patch_artist=True)
+        # Evaluate the colormap once for the whole palette
+        colors = self.cmap(np.arange(num_groups) / num_groups)
         for i, box in enumerate(boxes["boxes"]):
-            box.set_facecolor(self.cmap(i / num_groups))
-        plt.xlabel("Gruop")
-        plt.ylabel("Delta")
-        plt.savefig(os.path.join(self.path_for_fig, "clinical_groups_box_plot.svg"))
-        plt.close()
+            box.set_facecolor(colors[i])
+        ax.set_xlabel("Gruop")
+        ax.set_ylabel("Delta")
+        self._save(fig, os.path.join(self.path_for_fig, "clinical_groups_box_plot.svg"))
 
     def classification_auc(self, y, y_pred, groups):
         """Plot ROC curve.
@@ -285,11 +408,11 @@ class Visualizer:
         auc = roc_auc_score(y, y_pred)
 
         # Plot ROC curve
-        plt.plot(fpr, tpr, color='darkorange', lw=2, label='ROC curve (area = %0.2f)' % auc)
-        plt.plot([0, 1], [0, 1], color='navy', lw=2, linestyle='--')
-        plt.xlabel('False Positive Rate')
-        plt.ylabel('True Positive Rate')
-        plt.title('ROC curve %s vs %s' % (groups[0], groups[1]))
-        plt.legend(loc="lower right")
-        plt.savefig(os.path.join(self.path_for_fig, "roc_curve_%s_vs_%s.svg" % (groups[0], groups[1])))
-        plt.close()
+        fig, ax = self._single_axes()
+        ax.plot(fpr, tpr, color='darkorange', lw=2, label='ROC curve (area = %0.2f)' % auc)
+        ax.plot([0, 1], [0, 1], color='navy', lw=2, linestyle='--')
+        ax.set_xlabel('False Positive Rate')
+        ax.set_ylabel('True Positive Rate')
+        ax.set_title('ROC curve %s vs %s' % (groups[0], groups[1]))
+        ax.legend(loc="lower right")
+        self._save(fig, os.path.join(self.path_for_fig, "roc_curve_%s_vs_%s.svg" % (groups[0], groups[1])))
@@ -46,6 +46,8 @@ def test_visualizer_setup():
 def test_visualizer_age_distribution(dummy_viz, np_test_data):
     # Plot 'age' distribution (response variable, Y)
     dummy_viz.age_distribution(np_test_data[:, -1])
+    # Saving is asynchronous; wait for the file to reach disk
+    dummy_viz.flush()
     # Check file existance
     svg_path = os.path.join(dummy_viz.dir, "figures/age_distribution_.svg")
     assert os.path.exists(svg_path)
@@ -62,6 +64,8 @@ def test_features_vs_age(dummy_viz, np_test_data):
     reject_fdr, _, _, _ = multipletests(p_values, alpha=0.05, method='fdr_bh')
     significant = significant_markers(reject_bon, reject_fdr)
     dummy_viz.features_vs_age([X], [Y], [corr], [order], [significant], ["X1", "X2", "X3"])
+    # Saving is asynchronous; wait for the file to reach disk
+    dummy_viz.flush()
     
     # Check file existence
     svg_path = os.path.join(dummy_viz.dir, "figures/features_vs_age.svg")
@@ -77,6 +81,8 @@ def test_true_vs_pred_age(dummy_viz, np_test_data, dummy_ml):
     # Fit Age
     Y_pred, _ = dummy_ml.fit_age(X, Y)
     dummy_viz.true_vs_pred_age(Y, Y_pred)
+    # Saving is asynchronous; wait for the file to reach disk
+    dummy_viz.flush()
     # Check file existence
     svg_path = os.path.join(dummy_viz.dir, "figures/chronological_vs_pred_age.svg")
     assert os.path.exists(svg_path)
@@ -91,6 +97,8 @@ def test_age_bias_correction(dummy_viz, np_test_data, dummy_ml):
     # Fit Age
     Y_pred, Y_corrected = dummy_ml.fit_age(X, Y)
     dummy_viz.age_bias_correction(Y, Y_pred, Y_corrected)
+    # Saving is asynchronous; wait for the file to reach disk
+    dummy_viz.flush()
     # Check file existence
     svg_path = os.path.join(dummy_viz.dir, "figures/age_bias_correction.svg")
     assert os.path.exists(svg_path)
@@ -106,6 +114,8 @@ def test_factors_vs_deltas(dummy_viz):
     markers = [['', '*', '', '*', '**']]
     # Plot
     dummy_viz.factors_vs_deltas(corrs, groups, labels, markers)
+    # Saving is asynchronous; wait for the file to reach disk
+    dummy_viz.flush()
     # Check file existence
     svg_path = os.path.join(dummy_viz.dir, "figures/factors_vs_deltas.svg")
     assert os.path.exists(svg_path)
@@ -125,6 +135,8 @@ def test_deltas_by_groups(dummy_viz, np_test_data, dummy_ml):
     labels = ["Group 1"]
     # Plot
     dummy_viz.deltas_by_groups(deltas, labels)
+    # Saving is asynchronous; wait for the file to reach disk
+    dummy_viz.flush()
     # Check file existence
     svg_path = os.path.join(dummy_viz.dir, "figures/clinical_groups_box_plot.svg")
     assert os.path.exists(svg_path)
@@ -139,6 +151,8 @@ def test_classification_auc(dummy_viz):
     groups = ["group1", "group2"]
     # Plot
     dummy_viz.classification_auc(y, y_pred, groups)
+    # Saving is asynchronous; wait for the file to reach disk
+    dummy_viz.flush()
     # Check file existence
     svg_path = os.path.join(dummy_viz.dir, "figures/roc_curve_%s_vs_%s.svg" % (groups[0], groups[1]))
     assert os.path.exists(svg_path)